@@ -208,6 +208,10 @@ class GetDocumentPayload(BaseModel):
     document_id: str
 
 
+class DeleteDocumentsPayload(BaseModel):
+    document_ids: list[str]
+
+
 class LoadPayload(BaseModel):
     reader: str
     chunker: str
@@ -568,6 +572,25 @@ async def delete_document(payload: GetDocumentPayload):
     return JSONResponse(content={})
 
 
+# Delete every imported document server-side in a single request
+@app.post("/api/delete_all_documents")
+async def delete_all_documents():
+    msg.info("Delete all documents request received")
+
+    deleted_count = manager.delete_all_documents()
+    return JSONResponse(content={"deleted": deleted_count})
+
+
+# Delete several documents in a single request
+@app.post("/api/delete_documents")
+async def delete_documents(payload: DeleteDocumentsPayload):
+    msg.info(f"Batch delete received for {len(payload.document_ids)} documents")
+
+    for doc_id in payload.document_ids:
+        manager.delete_document_by_id(doc_id)
+    return JSONResponse(content={})
+
+
 #setting openai key
 @app.post("/api/set_openai_key")
 async def set_openai_key(payload: APIKeyPayload):
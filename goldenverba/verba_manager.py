@@ -404,6 +404,15 @@ class VerbaManager:
             self.client, doc_id
         )
 
+    def delete_all_documents(self) -> int:
+        """Delete every document imported to Weaviate
+        @returns int - Number of deleted documents
+        """
+        documents = self.retrieve_all_documents("")
+        for document in documents:
+            self.delete_document_by_id(document["_additional"]["id"])
+        return len(documents)
+
     def search_documents(self, query: str, doc_type: str) -> list:
         return self.embedder_manager.selected_embedder.search_documents(
             self.client, query, doc_type
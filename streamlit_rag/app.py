@@ -4,16 +4,76 @@ import pathlib
 
 import click
 import streamlit as st
-from st_pages import Page, show_pages
-from verba_utils.api_client import APIClient, test_api_connection
 from verba_utils.utils import (
+    Msg,
     append_documents_in_session_manager,
+    cached_test_api_connection,
+    clear_session_history,
     generate_answer,
     get_chatbot_title,
+    init_api_client,
     setup_logging,
 )
 
 BASE_ST_DIR = pathlib.Path(os.path.dirname(__file__))
+ASSISTANT_AVATAR = str(BASE_ST_DIR / "assets/WL.png")
+PAGE_ICON = str(BASE_ST_DIR / "assets/WL_icon.png")
+
+log = logging.getLogger(__name__)
+
+
+@st.fragment
+def chat_interface(api_client, max_nb_words: int):
+    """Chat history + prompt handling. Scoped in a st.fragment so widget
+    interactions elsewhere on the page do not re-render the whole
+    conversation on every rerun.
+
+    :param APIClient api_client:
+    :param int max_nb_words: maximum words wanted in the generated answer
+    """
+    if st.button("Reset conversation", type="primary"):
+        # Delete message and document items in session state
+        clear_session_history()
+
+    if "messages" not in st.session_state.keys():
+        st.session_state.messages = [
+            Msg(
+                "assistant",
+                "Greetings! I am your chatbot assistant, here to help. If the answers to your questions are in the documents you've uploaded, I can provide them. While you're free to ask in any language, for the best results, I recommend using the language of the uploaded documents.",
+            )
+        ]
+
+    # Display chat messages
+    for message in st.session_state.messages:
+        with st.chat_message(
+            message.role,
+            avatar=ASSISTANT_AVATAR if message.role == "assistant" else None,
+        ):
+            st.markdown(message.content)
+
+    # User-provided prompt
+    if prompt := st.chat_input():
+        st.session_state.messages.append(Msg("user", prompt))
+        with st.chat_message("user"):
+            st.markdown(prompt)
+
+    # Generate a new response if last message is not from assistant
+    if st.session_state.messages[-1].role != "assistant":
+        with st.chat_message("assistant", avatar=ASSISTANT_AVATAR):
+            with st.spinner("Thinking..."):
+                log.debug("User prompt : %s", prompt)
+                response, documents = None, None
+                if prompt is not None:
+                    response, documents = generate_answer(
+                        prompt,
+                        api_client,
+                        max_nb_words=max_nb_words,
+                        return_documents=True,
+                    )
+                    st.markdown(response)
+                    append_documents_in_session_manager(prompt, documents)
+                if response:
+                    st.session_state.messages.append(Msg("assistant", response))
 
 
 @click.command()
@@ -44,17 +104,11 @@ def main(verba_port, verba_base_url, chunk_size):
     os.environ["VERBA_BASE_URL"] = verba_base_url
     os.environ["CHUNK_SIZE"] = str(chunk_size)
 
-    log = logging.getLogger(__name__)
+    api_client = init_api_client()
 
-    if (not "VERBA_PORT" in os.environ) or (not "VERBA_BASE_URL" in os.environ):
-        st.warning(
-            '"VERBA_PORT" or "VERBA_BASE_URL" not found in env variable. To solve this, good to Home page and reload the page.'
-        )
-        st.stop()
-    else:
-        api_client = APIClient()
-
-    is_verba_responding = test_api_connection(api_client)
+    is_verba_responding = cached_test_api_connection(
+        os.environ["VERBA_BASE_URL"], os.environ["VERBA_PORT"]
+    )
 
     if not is_verba_responding["is_ok"]:  # verba api not responding
         st.title(f"🤖 {TITLE} 🔴")
@@ -72,94 +126,48 @@ def main(verba_port, verba_base_url, chunk_size):
                 f"Connection to verba backend failed -> details : {is_verba_responding['error_details']}",
                 icon="🚨",
             )
-        if st.button("🔄 Try again", type="primary"):
-            # when the button is clicked, the page will refresh by itself :)
-            log.debug("Refresh page")
+        # on_click runs before the rerun, so the cleared health probe is
+        # re-attempted immediately instead of on the next interaction
+        st.button(
+            "🔄 Try again", type="primary", on_click=cached_test_api_connection.clear
+        )
     else:  # verba api connected
         st.title(f"🤖 {TITLE} 🟢")
-
-        if st.button("Reset conversation", type="primary"):
-            # Delete message and document items in session state
-            if "messages" in st.session_state:
-                del st.session_state["messages"]
-            if "retrieved_documents" in st.session_state:
-                del st.session_state["retrieved_documents"]
-
-        if "messages" not in st.session_state.keys():
-            st.session_state.messages = [
-                {
-                    "role": "assistant",
-                    "content": "Greetings! I am your chatbot assistant, here to help. If the answers to your questions are in the documents you've uploaded, I can provide them. While you're free to ask in any language, for the best results, I recommend using the language of the uploaded documents.",
-                }
-            ]
-
-        # Display chat messages
-        for message in st.session_state.messages:
-            with st.chat_message(
-                message["role"],
-                avatar=str(BASE_ST_DIR / "assets/WL.png")
-                if message["role"] == "assistant"
-                else None,
-            ):
-                st.markdown(message["content"])
-
-        # User-provided prompt
-        if prompt := st.chat_input():
-            st.session_state.messages.append({"role": "user", "content": prompt})
-            with st.chat_message("user"):
-                st.markdown(prompt)
-
-        # Generate a new response if last message is not from assistant
-        if st.session_state.messages[-1]["role"] != "assistant":
-            with st.chat_message(
-                "assistant", avatar=str(BASE_ST_DIR / "assets/WL.png")
-            ):
-                with st.spinner("Thinking..."):
-                    log.debug(f"User prompt : {prompt}")
-                    response, documents = None, None
-                    if prompt is not None:
-                        response, documents = generate_answer(
-                            prompt,
-                            api_client,
-                            max_nb_words=max_worlds_answers,
-                            return_documents=True,
-                        )
-                        st.markdown(response)
-                        append_documents_in_session_manager(prompt, documents)
-                    if response:
-                        message = {"role": "assistant", "content": response}
-                        st.session_state.messages.append(message)
+        chat_interface(api_client, max_worlds_answers)
 
 
 if __name__ == "__main__":
     setup_logging()
 
-    try:
-        TITLE = get_chatbot_title()
-    except:  # Should never happen but I don't want the app to crash for a title
-        TITLE = "Worldline MS Chatbot"
+    TITLE = get_chatbot_title()
 
     st.set_page_config(
         initial_sidebar_state="expanded",
         layout="centered",
         page_title=TITLE,
-        page_icon=str(BASE_ST_DIR / "assets/WL_icon.png"),
+        page_icon=PAGE_ICON,
     )
 
-    show_pages(
-        [
-            Page(BASE_ST_DIR / "app.py", "Chatbot"),
-            Page(
-                BASE_ST_DIR / "app_pages/source_documents.py",
-                "Source documents",
-            ),
-            Page(
-                BASE_ST_DIR / "app_pages/document_admin.py",
-                "Document administration",
-            ),
-            Page(BASE_ST_DIR / "app_pages/admin.py", "Administration"),
-        ]
-    )
+    if not st.session_state.get("_pages_registered"):
+        # registering the pages is only needed once per session, not on
+        # every rerun (st_pages is only imported when we actually register)
+        from st_pages import Page, show_pages
+
+        show_pages(
+            [
+                Page(BASE_ST_DIR / "app.py", "Chatbot"),
+                Page(
+                    BASE_ST_DIR / "app_pages/source_documents.py",
+                    "Source documents",
+                ),
+                Page(
+                    BASE_ST_DIR / "app_pages/document_admin.py",
+                    "Document administration",
+                ),
+                Page(BASE_ST_DIR / "app_pages/admin.py", "Administration"),
+            ]
+        )
+        st.session_state["_pages_registered"] = True
 
     st.sidebar.header("Config")
     max_worlds_answers = st.sidebar.slider(
@@ -4,9 +4,11 @@ import pathlib
 import shelve
 
 import streamlit as st
-from verba_utils.api_client import APIClient, test_api_connection
+from verba_utils.api_client import get_api_client
 from verba_utils.utils import (
+    cached_test_api_connection,
     get_chatbot_title,
+    init_api_client,
     reset_chatbot_title,
     store_chatbot_title,
 )
@@ -16,6 +18,17 @@ BASE_ST_DIR = pathlib.Path(os.path.dirname(__file__)).parent
 log = logging.getLogger(__name__)
 
 
+@st.cache_data(ttl=30, show_spinner=False)
+def cached_openai_key_preview() -> str:
+    """Cached wrapper around APIClient.get_openai_key_preview so reruns of
+    this page do not fire a backend request on every widget interaction.
+    Cleared whenever the key is set or removed.
+
+    :return str:
+    """
+    return get_api_client().get_openai_key_preview()
+
+
 st.set_page_config(
     layout="centered",
     initial_sidebar_state="expanded",
@@ -23,15 +36,11 @@ st.set_page_config(
     page_icon=str(BASE_ST_DIR / "assets/WL_icon.png"),
 )
 
-if (not "VERBA_PORT" in os.environ) or (not "VERBA_BASE_URL" in os.environ):
-    st.warning(
-        '"VERBA_PORT" or "VERBA_BASE_URL" not found in env variable. To solve this, good to Home page and reload the page.'
-    )
-    st.stop()
-else:
-    api_client = APIClient()
+api_client = init_api_client()
 
-is_verba_responding = test_api_connection(api_client)
+is_verba_responding = cached_test_api_connection(
+    os.environ["VERBA_BASE_URL"], os.environ["VERBA_PORT"]
+)
 
 if not is_verba_responding["is_ok"] and not (
     "upload a key using /api/set_openai_key" in is_verba_responding["error_details"]
@@ -45,9 +54,11 @@ if not is_verba_responding["is_ok"] and not (
             f"Connection to verba backend failed -> details : {is_verba_responding['error_details']}",
             icon="🚨",
         )
-    if st.button("🔄 Try again", type="primary"):
-        # when the button is clicked, the page will refresh by itself :)
-        log.debug("Refresh page")
+    # on_click runs before the rerun, so the cleared health probe is
+    # re-attempted immediately instead of on the next interaction
+    st.button(
+        "🔄 Try again", type="primary", on_click=cached_test_api_connection.clear
+    )
 
 else:
     st.title("⚙️ Administration 🟢")
@@ -60,14 +71,16 @@ else:
     )
 
     st.subheader("Open AI API key", divider="blue")
-    key_preview = api_client.get_openai_key_preview()
+    key_preview = cached_openai_key_preview()
     if len(key_preview) > 0:
         st.markdown("#### Current uploaded key :")
         col0, col1, col2, col3, col4 = st.columns([0.17, 0.17, 0.32, 0.17, 0.17])
         with col0:
-            if st.button("🔄 Refresh", type="primary"):
-                # when the button is clicked, the page will refresh by itself :)
-                log.debug("Refresh page")
+            # on_click runs before the rerun, so the cleared cache is
+            # refetched on the very rerun the click triggers
+            st.button(
+                "🔄 Refresh", type="primary", on_click=cached_openai_key_preview.clear
+            )
 
         with col1:
             show = st.toggle("Show API key preview")
@@ -98,6 +111,7 @@ else:
                     with st.spinner("Removing your API key..."):
                         success = api_client.unset_openai_key()
                         if success:
+                            cached_openai_key_preview.clear()
                             st.info("Key successfully removed")
                         else:
                             st.error("Something went wrong when deleting your key")
@@ -106,9 +120,9 @@ else:
         st.header("No Open AI API key uploaded yet")
         col0, col1, col2, col3, col4 = st.columns([0.17, 0.17, 0.32, 0.17, 0.17])
         with col0:
-            if st.button("🔄 Refresh", type="primary"):
-                # when the button is clicked, the page will refresh by itself :)
-                log.debug("Refresh page")
+            st.button(
+                "🔄 Refresh", type="primary", on_click=cached_openai_key_preview.clear
+            )
     st.markdown("#### Enter your new API key (it overwrites the previous one):")
     api_key = st.text_input("API Key", type="password")
 
@@ -117,6 +131,7 @@ else:
             with st.spinner("Uploading your secret api key..."):
                 res = api_client.set_openai_key(api_key=api_key)
                 if res.status == "200":
+                    cached_openai_key_preview.clear()
                     st.success(
                         "✅ API key saved successfully. You can refresh the list and test it!"
                     )
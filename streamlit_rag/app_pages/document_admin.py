@@ -1,32 +1,54 @@
-import base64
 import logging
 import os
 import pathlib
 
 import streamlit as st
-from verba_utils.api_client import APIClient, test_api_connection
 from verba_utils.payloads import LoadPayload
-from verba_utils.utils import doc_id_from_filename, get_ordered_all_filenames
+from verba_utils.utils import (
+    b64_encode_file,
+    cached_test_api_connection,
+    clear_answer_cache,
+    get_chunk_size,
+    get_doc_id_index,
+    get_ordered_all_filenames,
+    init_api_client,
+)
 
 log = logging.getLogger(__name__)
 
-try:
-    CHUNK_SIZE = int(os.environ.get("CHUNK_SIZE", 300))
-except ValueError:
-    CHUNK_SIZE = 300
-    log.warn(
-        f"Can't cast os.environ.get('CHUNK_SIZE', 300) to int, value : {os.environ.get('CHUNK_SIZE', 300)}. Setting it to default {CHUNK_SIZE}"
-    )
+BASE_ST_DIR = pathlib.Path(os.path.dirname(__file__)).parent
+CHUNK_SIZE = get_chunk_size()
 
 
-BASE_ST_DIR = pathlib.Path(os.path.dirname(__file__)).parent
-try:
-    CHUNK_SIZE = int(os.environ.get("CHUNK_SIZE", 300))
-except ValueError:
-    CHUNK_SIZE = 300
-    log.warn(
-        f"Can't cast os.environ.get('CHUNK_SIZE', 300) to int, value : {os.environ.get('CHUNK_SIZE', 300)}. Setting it to default {CHUNK_SIZE}"
-    )
+@st.cache_data(ttl=30, show_spinner=False)
+def cached_get_all_documents(_api_client, docs_version: int):
+    """Cached document list so the three tabs of this page do not each pull
+    the full list over HTTP on every rerun. docs_version is only part of the
+    cache key : bump it after an upload/delete to force a refetch.
+
+    :param APIClient _api_client: excluded from the cache key (leading _)
+    :param int docs_version:
+    :return SearchQueryResponsePayload:
+    """
+    return _api_client.get_all_documents()
+
+
+def bump_docs_version():
+    """Invalidate cached_get_all_documents after a mutating action"""
+    st.session_state["_docs_version"] = st.session_state.get("_docs_version", 0) + 1
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_get_document(_api_client, document_id: str):
+    """Cached single-document fetch : re-selecting a document already viewed
+    in the last minute reuses the response instead of re-pulling its full
+    text over HTTP
+
+    :param APIClient _api_client: excluded from the cache key (leading _)
+    :param str document_id:
+    :return GetDocumentResponsePayload:
+    """
+    return _api_client.get_document(document_id)
 
 
 st.set_page_config(
@@ -46,15 +68,11 @@ chuck_size = st.sidebar.slider(
 )
 
 
-if (not "VERBA_PORT" in os.environ) or (not "VERBA_BASE_URL" in os.environ):
-    st.warning(
-        '"VERBA_PORT" or "VERBA_BASE_URL" not found in env variable. To solve this, good to Home page and reload the page.'
-    )
-    st.stop()
-else:
-    api_client = APIClient()
+api_client = init_api_client()
 
-is_verba_responding = test_api_connection(api_client)
+is_verba_responding = cached_test_api_connection(
+    os.environ["VERBA_BASE_URL"], os.environ["VERBA_PORT"]
+)
 
 
 if not is_verba_responding["is_ok"]:  # verba api not responding
@@ -70,9 +88,11 @@ if not is_verba_responding["is_ok"]:  # verba api not responding
             f"Connection to verba backend failed -> details : {is_verba_responding['error_details']}",
             icon="🚨",
         )
-    if st.button("🔄 Try again", type="primary"):
-        # when the button is clicked, the page will refresh by itself :)
-        log.debug("Refresh page")
+    # on_click runs before the rerun, so the cleared health probe is
+    # re-attempted immediately instead of on the next interaction
+    st.button(
+        "🔄 Try again", type="primary", on_click=cached_test_api_connection.clear
+    )
 
 else:
     # verba api connected
@@ -87,20 +107,27 @@ else:
         ]
     )
 
+    # fetched/derived once per rerun and shared by the tabs below (st.tabs
+    # renders every tab on each rerun)
+    all_documents = cached_get_all_documents(
+        api_client, st.session_state.get("_docs_version", 0)
+    )
+    doc_name_to_id = get_doc_id_index(all_documents)
+    ordered_filenames = get_ordered_all_filenames(all_documents.documents)
+
     with inspect_tab:
         doc_list, doc_preview = st.columns([0.3, 0.7])
 
         with doc_list:  # display all found document as an ordered radio list
-            if st.button("🔄 Refresh list", type="primary"):
-                # when the button is clicked, the page will refresh by itself :)
-                log.debug("Refresh page")
+            # on_click callbacks run before the rerun, so the bumped version
+            # is already visible to the cached fetch at the top of the page
+            st.button("🔄 Refresh list", type="primary", on_click=bump_docs_version)
 
-            all_documents = api_client.get_all_documents()
             if len(all_documents.documents) > 0:
                 # if some documents are found display radio list
                 chosen_doc = st.radio(
                     "Choose the document you want to inspect",
-                    get_ordered_all_filenames(all_documents.documents),
+                    ordered_filenames,
                 )
             else:
                 chosen_doc = None
@@ -108,11 +135,8 @@ else:
 
         with doc_preview:  # display select document text content
             if chosen_doc is not None:
-                document_id = doc_id_from_filename(
-                    chosen_doc,
-                    all_documents,
-                )
-                doc_info = api_client.get_document(document_id)
+                document_id = doc_name_to_id[chosen_doc]
+                doc_info = cached_get_document(api_client, document_id)
                 st.header(chosen_doc)
 
                 st.text_area(
@@ -132,9 +156,8 @@ else:
             document_type = st.text_input("Kind of documents", value="Documentation")
             submitted = st.form_submit_button("Submit documents", type="primary")
             if submitted:
-                already_uploaded_files = get_ordered_all_filenames(
-                    api_client.get_all_documents().documents
-                )
+                # O(1) membership test against the already indexed doc names
+                already_uploaded_files = doc_name_to_id.keys()
                 loadPayload = LoadPayload(
                     reader="SimpleReader",
                     chunker="WordChunker",
@@ -150,7 +173,7 @@ else:
                             icon="⚠️",
                         )
                         continue
-                    encoded_document = base64.b64encode(file.getvalue()).decode("utf-8")
+                    encoded_document = b64_encode_file(file)
                     loadPayload.fileBytes.append(encoded_document)
                     loadPayload.fileNames.append(file.name)
                 if len(loadPayload.fileNames) > 0:
@@ -159,10 +182,10 @@ else:
                         + "` `".join([e for e in loadPayload.fileNames])
                         + "`. Please wait. Expect about 1 second per KB of text."
                     ):
-                        response = api_client.load_data(
-                            LoadPayload.model_validate(loadPayload)
-                        )
+                        response = api_client.load_data(loadPayload)
                         if str(response.status) == "200":
+                            bump_docs_version()
+                            clear_answer_cache()
                             st.info(f"✅ Documents successfully uploaded")
                         else:
                             st.error(
@@ -178,25 +201,19 @@ else:
                                 st.write(response)
 
     with delete_tab:
-        all_documents = api_client.get_all_documents()
         if not len(all_documents.documents) > 0:  # no uploaded documents
             st.header("No document uploaded yet")
         else:
             st.header("Delete one document")
-            if st.button("🔄 Refresh", type="primary"):
-                # when the button is clicked, the page will refresh by itself :)
-                log.debug("Refresh page")
+            st.button("🔄 Refresh", type="primary", on_click=bump_docs_version)
             document_to_delete = st.selectbox(
                 "Select the document you want to delete",
-                get_ordered_all_filenames(all_documents.documents),
+                ordered_filenames,
                 index=None,
             )
 
             if document_to_delete:  # if user selected a document
-                document_to_delete_id = doc_id_from_filename(
-                    document_to_delete,
-                    all_documents,
-                )
+                document_to_delete_id = doc_name_to_id[document_to_delete]
                 if st.button(
                     "🗑️ Delete document (irreversible)",
                 ):
@@ -205,6 +222,8 @@ else:
                             document_to_delete_id
                         )
                         if is_document_deleted:  # delete ok
+                            bump_docs_version()
+                            clear_answer_cache()
                             st.info(f"✅ {document_to_delete} successfully deleted")
                         else:  # delete failed
                             st.warning(
@@ -217,17 +236,15 @@ else:
             ):  # set a first button to avoid miss clicks
                 if st.button("🗑️ Remove all documents (irreversible)", type="primary"):
                     with st.spinner("Deleting all your documents..."):
-                        for doc in get_ordered_all_filenames(all_documents.documents):
-                            curr_doc_to_delete_id = doc_id_from_filename(
-                                doc,
-                                all_documents,
+                        # the backend resolves and deletes every document
+                        # itself, no need to send the id list
+                        if api_client.delete_all_documents():
+                            bump_docs_version()
+                            clear_answer_cache()
+                            st.info(
+                                f"✅ All {len(all_documents.documents)} documents successfully deleted"
                             )
-                            is_document_deleted = api_client.delete_document(
-                                curr_doc_to_delete_id
+                        else:
+                            st.warning(
+                                "🚨 Something went wrong when trying to delete your documents"
                             )
-                            if is_document_deleted:  # delete ok
-                                st.info(f"✅ {doc} successfully deleted")
-                            else:  # delete failed
-                                st.warning(
-                                    f"🚨 Something went wrong when trying to delete {doc}"
-                                )
@@ -3,8 +3,12 @@ import os
 import pathlib
 
 import streamlit as st
-from verba_utils.api_client import APIClient, test_api_connection
-from verba_utils.utils import get_prompt_history, get_retrieved_documents_from_prompt
+from verba_utils.utils import (
+    cached_test_api_connection,
+    get_prompt_history,
+    get_retrieved_documents_from_prompt,
+    init_api_client,
+)
 
 BASE_ST_DIR = pathlib.Path(os.path.dirname(__file__)).parent
 log = logging.getLogger(__name__)
@@ -17,15 +21,11 @@ st.set_page_config(
     page_icon=str(BASE_ST_DIR / "assets/WL_icon.png"),
 )
 
-if (not "VERBA_PORT" in os.environ) or (not "VERBA_BASE_URL" in os.environ):
-    st.warning(
-        '"VERBA_PORT" or "VERBA_BASE_URL" not found in env variable. To solve this, good to Home page and reload the page.'
-    )
-    st.stop()
-else:
-    api_client = APIClient()
+api_client = init_api_client()
 
-is_verba_responding = test_api_connection(api_client)
+is_verba_responding = cached_test_api_connection(
+    os.environ["VERBA_BASE_URL"], os.environ["VERBA_PORT"]
+)
 
 title = "📁 Source documents"
 
@@ -42,9 +42,11 @@ if not is_verba_responding["is_ok"]:  # verba api not responding
             f"Connection to verba backend failed -> details : {is_verba_responding['error_details']}",
             icon="🚨",
         )
-    if st.button("🔄 Try again", type="primary"):
-        # when the button is clicked, the page will refresh by itself :)
-        log.debug("Refresh page")
+    # on_click runs before the rerun, so the cleared health probe is
+    # re-attempted immediately instead of on the next interaction
+    st.button(
+        "🔄 Try again", type="primary", on_click=cached_test_api_connection.clear
+    )
 
 else:
     # verba api connected
@@ -1,14 +1,23 @@
 import logging
-from typing import Dict
+import os
+from typing import Dict, List
 
+import orjson
 import requests
-from pydantic import Field
+import streamlit as st
+from requests.adapters import HTTPAdapter
 from pydantic_core._pydantic_core import ValidationError
-from pydantic_settings import BaseSettings
-from tenacity import RetryError, retry, stop_after_attempt, wait_exponential
+from tenacity import (
+    RetryError,
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential,
+)
 from verba_utils.payloads import (
     APIKeyPayload,
     APIKeyResponsePayload,
+    DeleteDocumentsPayload,
     GetDocumentPayload,
     GetDocumentResponsePayload,
     LoadPayload,
@@ -21,10 +30,22 @@ from verba_utils.payloads import (
 
 log = logging.getLogger(__name__)
 
+# fallback answer returned by query() when the backend errored or sent an
+# unparsable body; callers can compare against it to tell failure from success
+QUERY_ERROR_MESSAGE = "Sorry, something went wrong when proceeding your request"
+
+# (connect, read) timeouts : without them a stalled backend hangs the
+# Streamlit worker indefinitely. Reads stay generous because answer
+# generation goes through the default
+REQUEST_TIMEOUT = (3.05, 60)
+# document ingestion is slow by nature (about 1 second per KB of text), so
+# leave ample headroom above the biggest batch we expect to see
+UPLOAD_TIMEOUT = (3.05, 3600)
+
 
-class API_routes(BaseSettings):
-    verba_port: str | int = Field(default="8000", env="VERBA_PORT")
-    verba_base_url: str = Field(default="http://localhost", env="VERBA_BASE_URL")
+class API_routes:
+    # Plain env reads : BaseSettings re-walked the whole environment and ran
+    # validators on every instantiation just to resolve these two strings
     health: str = "health"
     query: str = "query"
     get_all_documents: str = "get_all_documents"
@@ -32,11 +53,17 @@ class API_routes(BaseSettings):
     get_components: str = "get_components"
     load_data: str = "load_data"
     delete_document: str = "delete_document"
+    delete_documents: str = "delete_documents"
+    delete_all_documents: str = "delete_all_documents"
     set_openai_key: str = "set_openai_key"
     get_openai_key_preview: str = "get_openai_key_preview"
     unset_openai_key: str = "unset_openai_key"
     test_openai_api_key: str = "test_openai_api_key"
 
+    def __init__(self):
+        self.verba_port = os.environ.get("VERBA_PORT", "8000")
+        self.verba_base_url = os.environ.get("VERBA_BASE_URL", "http://localhost")
+
     @property
     def base_api_url(self) -> str:
         return f"{self.verba_base_url}:{self.verba_port}/api"
@@ -45,9 +72,24 @@ class API_routes(BaseSettings):
 class APIClient:
     def __init__(self):
         self.api_routes = API_routes()
+        # single pooled session : keep-alive spares the TCP handshake that
+        # requests.request() would otherwise pay on every call
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"content-type": "application/json"})
+        # full endpoint urls computed once : make_request does a dict lookup
+        # instead of re-formatting the same f-string on every call
+        base_api_url = self.api_routes.base_api_url
+        self._urls = {
+            route: f"{base_api_url}/{route}"
+            for name, route in vars(API_routes).items()
+            if isinstance(route, str) and not name.startswith("_")
+        }
 
     def make_request(
-        self, method, endpoint, params=None, data=None, json=None
+        self, method, endpoint, params=None, data=None, json=None, timeout=REQUEST_TIMEOUT
     ) -> requests.Response:
         """Generic method to make any request to the backend
 
@@ -56,121 +98,142 @@ class APIClient:
         :param params: defaults to None
         :param data: defaults to None
         :param json: defaults to None
+        :param timeout: (connect, read) tuple, defaults to REQUEST_TIMEOUT
         :return _type_:  requests.Response
         """
-        headers = {
-            "content-type": "application/json",
-        }
         url = self.build_url(endpoint)
-        log.info(f"Sending {method} request to {url}")
-        return requests.request(
+        log.info("Sending %s request to %s", method, url)
+        return self.session.request(
             method,
             url,
             params=params,
             json=json,
             data=data,
-            headers=headers,
+            timeout=timeout,
         )
 
     def build_url(self, endpoint: str) -> str:
-        """Helper function to build the endpoint url
+        """Helper function to get the endpoint url
 
         :param str endpoint: one attribute of API_routes
         :return str:
         """
-        return f"{self.api_routes.base_api_url}/{endpoint}"
+        return self._urls[endpoint]
 
-    @retry(
-        stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10)
-    )
-    def health_check(self) -> requests.Response:
-        # If this function fails three times in a row,
-        # it will stop being retried after approximately 6 seconds
-        # (2 seconds for the second attempt + 4 seconds for the third attempt).
-        # This is meant to avoid error when verba is starting
-        return self.make_request("GET", self.api_routes.health)
+    def _post_model(self, endpoint: str, payload, response_model, timeout=REQUEST_TIMEOUT):
+        """Shared POST template : serialize the payload once in pydantic-core,
+        send it, and parse an ok response into response_model. Returns
+        (parsed | None, response) so each caller keeps its own fallback.
 
-    def query(self, data: str) -> QueryResponsePayload:
+        :param str endpoint: one attribute of API_routes
+        :param payload: pydantic payload to send, or None for an empty body
+        :param response_model: pydantic model class to parse the response into
+        :param timeout: (connect, read) tuple, defaults to REQUEST_TIMEOUT
+        :return Tuple[response_model | None, requests.Response]:
+        """
         response = self.make_request(
             method="POST",
-            endpoint=self.api_routes.query,
-            json={
-                "query":data.decode('utf-8')
-            }
+            endpoint=endpoint,
+            data=None if payload is None else payload.model_dump_json(),
+            timeout=timeout,
         )
         if response.status_code == requests.status_codes.codes["ok"]:
             try:
-                return QueryResponsePayload.model_validate(response.json())
+                # single pass over the raw bytes in pydantic-core instead of
+                # requests.json() -> dict -> model_validate
+                return response_model.model_validate_json(response.content), response
             except ValidationError as e:
                 log.warning(
-                    f"Impossible to convert query response as QueryResponsePayload : {response.json()}, details : {e}"
+                    "Impossible to convert %s response as %s : %s, details : %s",
+                    endpoint,
+                    response_model.__name__,
+                    response.text,
+                    e,
                 )
         else:
-            log.warning(f"POST query returned code [{response.status_code}]")
+            log.warning(
+                "POST %s returned code [%s] details %s",
+                endpoint,
+                response.status_code,
+                response.content,
+            )
+        return None, response
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=0.25, min=0.25, max=2),
+        retry=retry_if_exception_type(requests.exceptions.ConnectionError),
+    )
+    def health_check(self) -> requests.Response:
+        # Retry only on connection errors (verba may still be starting) and
+        # give up after three attempts, sleeping at most ~1.25s in total so a
+        # slow backend does not stall the first page render for seconds
+        return self.make_request("GET", self.api_routes.health, timeout=(1, 2))
+
+    def query(self, data: str) -> QueryResponsePayload:
+        parsed, _ = self._post_model(
+            self.api_routes.query,
+            QueryPayload(query=data.decode("utf-8")),
+            QueryResponsePayload,
+        )
+        if parsed is not None:
+            return parsed
         return QueryResponsePayload(
-            system="Sorry, something went wrong when proceeding your request",
+            system=QUERY_ERROR_MESSAGE,
             documents=[],
         )
 
     def get_all_documents(
         self, query: str = "", doc_type: str = ""
     ) -> SearchQueryResponsePayload:
-        response = self.make_request(
-            method="POST",
-            endpoint=self.api_routes.get_all_documents,
-            data=SearchQueryPayload(query=query, doc_type=doc_type).model_dump_json(),
+        parsed, _ = self._post_model(
+            self.api_routes.get_all_documents,
+            SearchQueryPayload(query=query, doc_type=doc_type),
+            SearchQueryResponsePayload,
         )
-        if response.status_code == requests.status_codes.codes["ok"]:
-            try:
-                return SearchQueryResponsePayload.model_validate(response.json())
-            except ValidationError as e:
-                log.warning(
-                    f"Impossible to convert get_all_documents response as SearchQueryResponsePayload : {response.json()}, details : {e}"
-                )
-        else:
-            log.warning(f"POST query returned code [{response.status_code}]")
-        return SearchQueryResponsePayload([], [], "")
+        if parsed is not None:
+            return parsed
+        return SearchQueryResponsePayload(documents=[], doc_types=[], current_embedder="")
 
     def get_document(self, document_id: str) -> GetDocumentResponsePayload:
-        response = self.make_request(
-            method="POST",
-            endpoint=self.api_routes.get_document,
-            data=GetDocumentPayload(document_id=document_id).model_dump_json(),
+        parsed, _ = self._post_model(
+            self.api_routes.get_document,
+            GetDocumentPayload(document_id=document_id),
+            GetDocumentResponsePayload,
         )
-        if response.status_code == requests.status_codes.codes["ok"]:
-            try:
-                return GetDocumentResponsePayload.model_validate(response.json())
-            except ValidationError as e:
-                log.warning(
-                    f"Impossible to convert get_all_documents response as SearchQueryResponsePayload : {response.json()}, details : {e}"
-                )
-        else:
-            log.warning(f"POST query returned code [{response.status_code}]")
-        return GetDocumentResponsePayload({})
+        if parsed is not None:
+            return parsed
+        return GetDocumentResponsePayload()
 
     def get_components(self) -> requests.Response:
         return self.make_request("GET", self.api_routes.get_components)
 
     def load_data(self, loadPayload: LoadPayload) -> LoadResponsePayload:
         log.info(
-            f"Loading data with {len(loadPayload.fileNames)} documents (chunk size: {loadPayload.chunkUnits}, chunker: {loadPayload.chunker}, chunkOverlap: {loadPayload.chunkOverlap}, embedder: {loadPayload.embedder})"
+            "Loading data with %s documents (chunk size: %s, chunker: %s, chunkOverlap: %s, embedder: %s)",
+            len(loadPayload.fileNames),
+            loadPayload.chunkUnits,
+            loadPayload.chunker,
+            loadPayload.chunkOverlap,
+            loadPayload.embedder,
         )
-        response = self.make_request(
-            method="POST",
-            endpoint=self.api_routes.load_data,
-            json=loadPayload.model_dump(),
-        )
-        if response.status_code == requests.status_codes.codes["ok"]:
-            try:
-                return LoadResponsePayload.model_validate(response.json())
-            except ValidationError as e:
-                log.warning(
-                    f"Impossible to convert get_all_documents response as SearchQueryResponsePayload : {response.json()}, details : {e}"
-                )
-        else:
-            log.error(
-                f"POST query returned code [{response.status_code}] details {response.content}"
+        try:
+            parsed, response = self._post_model(
+                self.api_routes.load_data,
+                loadPayload,
+                LoadResponsePayload,
+                timeout=UPLOAD_TIMEOUT,
             )
+        except requests.exceptions.Timeout as e:
+            # degrade like any other failed upload instead of crashing the
+            # page with a traceback
+            log.error("POST load_data timed out, details : %s", e)
+            return LoadResponsePayload(
+                status=408,
+                status_msg="Upload timed out, try again with fewer or smaller documents",
+            )
+        if parsed is not None:
+            return parsed
         return LoadResponsePayload(
             status=response.status_code, status_msg=response.text
         )
@@ -184,34 +247,60 @@ class APIClient:
         if response.status_code == requests.status_codes.codes["ok"]:
             return True
         else:
-            log.warning(f"POST query returned code [{response.status_code}]")
+            log.warning("POST query returned code [%s]", response.status_code)
             return False
 
-    def set_openai_key(self, api_key: str) -> APIKeyResponsePayload:
+    def delete_documents(self, document_ids: List[str]) -> bool:
+        """Delete several documents in a single backend round-trip instead of
+        one delete_document request per document
+
+        :param List[str] document_ids:
+        :return bool: True if the batch was deleted
+        """
         response = self.make_request(
             method="POST",
-            endpoint=self.api_routes.set_openai_key,
-            data=APIKeyPayload(key=api_key).model_dump_json(),
+            endpoint=self.api_routes.delete_documents,
+            data=DeleteDocumentsPayload(document_ids=document_ids).model_dump_json(),
         )
         if response.status_code == requests.status_codes.codes["ok"]:
-            try:
-                return APIKeyResponsePayload.model_validate(response.json())
-            except ValidationError as e:
-                log.warning(
-                    f"Impossible to convert set_openai_key response as APIKeyResponsePayload : {response.json()}, details : {e}"
-                )
+            return True
         else:
-            log.error(
-                f"POST query returned code [{response.status_code}] details {response.content}"
-            )
-        return LoadResponsePayload(
-            status=response.status_code, status_msg=response.text
+            log.warning("POST query returned code [%s]", response.status_code)
+            return False
+
+    def delete_all_documents(self) -> bool:
+        """Ask the backend to delete every imported document server-side,
+        without shipping the id list over the wire
+
+        :return bool: True if the deletion succeeded
+        """
+        response = self.make_request(
+            method="POST", endpoint=self.api_routes.delete_all_documents
+        )
+        if response.status_code == requests.status_codes.codes["ok"]:
+            return True
+        else:
+            log.warning("POST query returned code [%s]", response.status_code)
+            return False
+
+    def set_openai_key(self, api_key: str) -> APIKeyResponsePayload:
+        parsed, response = self._post_model(
+            self.api_routes.set_openai_key,
+            APIKeyPayload(key=api_key),
+            APIKeyResponsePayload,
+        )
+        if parsed is not None:
+            return parsed
+        return APIKeyResponsePayload(
+            status=str(response.status_code), status_msg=response.text
         )
 
     def get_openai_key_preview(self) -> str:
-        response = self.make_request(
-            "GET", self.api_routes.get_openai_key_preview
-        ).json()
+        # orjson parses the raw bytes directly, skipping requests' charset
+        # detection + stdlib json on these small status payloads
+        response = orjson.loads(
+            self.make_request("GET", self.api_routes.get_openai_key_preview).content
+        )
 
         if response["status"] == "200":
             return response["status_msg"]
@@ -219,12 +308,23 @@ class APIClient:
             return ""
 
     def unset_openai_key(self) -> bool:
-        response = self.make_request("POST", self.api_routes.unset_openai_key).json()
-        return response["status"] == "200"
+        response = self.make_request("POST", self.api_routes.unset_openai_key)
+        return orjson.loads(response.content)["status"] == "200"
 
     def test_openai_api_key(self) -> Dict:
         response = self.make_request("GET", self.api_routes.test_openai_api_key)
-        return response.json()
+        return orjson.loads(response.content)
+
+
+@st.cache_resource(show_spinner=False)
+def get_api_client() -> APIClient:
+    """Return a single APIClient shared across reruns and pages. Streamlit
+    reruns the whole script on every widget interaction, so instantiating
+    the client inline would rebuild it (and re-parse its settings) each time.
+
+    :return APIClient:
+    """
+    return APIClient()
 
 
 def test_api_connection(api_client: APIClient) -> dict:
@@ -239,14 +339,14 @@ def test_api_connection(api_client: APIClient) -> dict:
         if response.status_code == requests.status_codes.codes["ok"]:
             return {"is_ok": True}
         else:
-            log.error(f"API health status code :{response.status_code}")
-            log.error(f"API health content :{response.json()}")
+            log.error("API health status code :%s", response.status_code)
+            log.error("API health content :%s", response.json())
             return {
                 "is_ok": False,
                 "error_details": f"API health status code : {response.status_code} - API health content : {response.json()}",
             }
     except (requests.exceptions.RequestException, RetryError) as e:
-        log.error(f"Connection error, make sure verba is running details : {e}")
+        log.error("Connection error, make sure verba is running details : %s", e)
         return {
             "is_ok": False,
             "error_details": f"Connection error : {e} Make sure Verba is running or accessible",
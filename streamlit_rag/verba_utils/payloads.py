@@ -25,7 +25,7 @@ class DocumentSearchQueryResponsePayload(BaseModel):
     class AdditionalItem(BaseModel):
         id: str = ""
 
-    additional: AdditionalItem = Field(alias="_additional", default=AdditionalItem())
+    additional: AdditionalItem = Field(alias="_additional", default_factory=AdditionalItem)
     doc_link: str = ""
     doc_name: str = ""
     doc_type: str = ""
@@ -33,7 +33,7 @@ class DocumentSearchQueryResponsePayload(BaseModel):
 
 class SearchQueryResponsePayload(BaseModel):
     documents: List[DocumentSearchQueryResponsePayload]
-    doc_types: List
+    doc_types: List[str]
     current_embedder: str
 
 
@@ -41,6 +41,10 @@ class GetDocumentPayload(BaseModel):
     document_id: str
 
 
+class DeleteDocumentsPayload(BaseModel):
+    document_ids: List[str]
+
+
 class GetDocumentResponsePayload(BaseModel):
     class DocumentResponsePayload(BaseModel):
         class DocumentPropertiesResponsePayload(BaseModel):
@@ -55,13 +59,13 @@ class GetDocumentResponsePayload(BaseModel):
         creationTimeUnix: int = 0
         id: str = ""
         lastUpdateTimeUnix: int = 0
-        properties: DocumentPropertiesResponsePayload = (
-            DocumentPropertiesResponsePayload()
+        properties: DocumentPropertiesResponsePayload = Field(
+            default_factory=DocumentPropertiesResponsePayload
         )
         tenant: str = ""
         vectorWeights: Any = None
 
-    document: DocumentResponsePayload = DocumentResponsePayload()
+    document: DocumentResponsePayload = Field(default_factory=DocumentResponsePayload)
 
 
 class LoadPayload(BaseModel):
@@ -90,10 +94,6 @@ class SetComponentPayload(BaseModel):
     selected_component: str
 
 
-class APIKeyPayload(BaseModel):
-    key: str
-
-
 class APIKeyResponsePayload(BaseModel):
     status: str
     status_msg: str
@@ -1,11 +1,26 @@
+import dbm
+import functools
 import logging
 import os
 import pathlib
 import shelve
+from collections import namedtuple
 from typing import Dict, List, Tuple
 
+try:
+    # SIMD accelerated, drop-in compatible base64 implementation
+    from pybase64 import b64encode
+except ImportError:
+    from base64 import b64encode
+
+import requests
 import streamlit as st
-from verba_utils.api_client import APIClient, test_api_connection
+from verba_utils.api_client import (
+    QUERY_ERROR_MESSAGE,
+    APIClient,
+    get_api_client,
+    test_api_connection,
+)
 from verba_utils.payloads import (
     DocumentSearchQueryResponsePayload,
     QueryResponsePayload,
@@ -15,6 +30,15 @@ from verba_utils.payloads import (
 log = logging.getLogger(__name__)
 
 
+class BackendQueryError(Exception):
+    """Raised inside _query_verba when the backend answered with an error so
+    st.cache_data does not cache the failure under the question's key"""
+
+# Compact chat-history record : a namedtuple is much lighter than a dict per
+# message and the history list is iterated on every Streamlit rerun
+Msg = namedtuple("Msg", ["role", "content"])
+
+
 def setup_logging(
     logging_level=logging.INFO,
     log_format: str = "[%(asctime)s] %(levelname)s [%(name)s.%(funcName)s:%(lineno)d] %(message)s",
@@ -25,7 +49,71 @@ def setup_logging(
     :param log_format: str by default -> "[%(asctime)s] %(levelname)s [%(name)s.%(funcName)s:%(lineno)d] %(message)s"
     :return: nothing
     """
+    # Streamlit reruns the script (and this call) on every interaction, so
+    # make the setup a one-shot to avoid reconfiguring/duplicating handlers
+    if getattr(setup_logging, "_configured", False):
+        return
     logging.basicConfig(level=logging_level, format=log_format)
+    setup_logging._configured = True
+
+
+@st.cache_data(ttl=5, show_spinner=False)
+def cached_test_api_connection(verba_base_url: str, verba_port: str) -> dict:
+    """Session-cached version of test_api_connection. Streamlit reruns the
+    whole script on every widget interaction, so an uncached health check
+    means one backend round-trip per rerun. The env var values are only used
+    as the cache key (APIClient reads them itself).
+
+    :param str verba_base_url:
+    :param str verba_port:
+    :return dict:
+    """
+    return test_api_connection(get_api_client())
+
+
+def init_api_client() -> APIClient:
+    """Common page bootstrap : stop the script with a warning when the
+    backend env variables are missing, otherwise return the shared APIClient.
+    Each page used to carry its own copy of this block.
+
+    :return APIClient:
+    """
+    if (not "VERBA_PORT" in os.environ) or (not "VERBA_BASE_URL" in os.environ):
+        st.warning(
+            '"VERBA_PORT" or "VERBA_BASE_URL" not found in env variable. To solve this, good to Home page and reload the page.'
+        )
+        st.stop()
+    return get_api_client()
+
+
+def get_chunk_size(default: int = 300) -> int:
+    """Chunk size from the CHUNK_SIZE env variable. Not cached : app.py's
+    main() sets CHUNK_SIZE in-process from the --chunk_size CLI argument, so
+    the value can legitimately appear after this was first called (e.g. a
+    deep link to an admin page served before the home page ran)
+
+    :param int default: value used when CHUNK_SIZE is unset or not an int
+    :return int:
+    """
+    try:
+        return int(os.environ.get("CHUNK_SIZE", default))
+    except ValueError:
+        log.warning(
+            "Can't cast os.environ.get('CHUNK_SIZE') to int, value : %s. Setting it to default %s",
+            os.environ.get("CHUNK_SIZE"),
+            default,
+        )
+        return default
+
+
+@functools.lru_cache(maxsize=1)
+def get_weaviate_tenant() -> str:
+    """Weaviate tenant from the WEAVIATE_TENANT env variable, read once per
+    process
+
+    :return str:
+    """
+    return os.getenv("WEAVIATE_TENANT", default="default_tenant")
 
 
 def write_centered_text(text: str):
@@ -36,6 +124,34 @@ def write_centered_text(text: str):
     st.write("\n")
 
 
+@st.cache_data(ttl=3600, show_spinner=False)
+def _query_verba(_api_client: APIClient, elaborated_question: bytes) -> QueryResponsePayload:
+    """Cached backend query : reruns triggered by unrelated widgets (or the
+    same question asked twice in a session) reuse the answer instead of
+    re-hitting the LLM. The question bytes already carry the word-count
+    appendix, so they are the whole cache key.
+
+    Only successful answers are cached : st.cache_data does not memoize
+    calls that raise, so backend errors are retried on the next rerun
+    instead of being served for the whole ttl.
+
+    :param APIClient _api_client: excluded from the cache key (leading _)
+    :param bytes elaborated_question:
+    :return QueryResponsePayload:
+    :raises BackendQueryError: when the backend returned an error answer
+    """
+    response = _api_client.query(elaborated_question)
+    if response.system == QUERY_ERROR_MESSAGE:
+        raise BackendQueryError()
+    return response
+
+
+def clear_answer_cache():
+    """Invalidate cached answers ; called after the document corpus changes
+    (upload/delete) so repeated questions see the new documents"""
+    _query_verba.clear()
+
+
 def generate_answer(
     prompt: str,
     api_client: APIClient,
@@ -63,16 +179,18 @@ def generate_answer(
     else:
         question_appendix = ""
 
-    elaborated_question = (str(prompt) + str(question_appendix)).encode("utf-8")
-    log.info(f"Cleaned user query : {elaborated_question}")
+    elaborated_question = f"{prompt}{question_appendix}".encode("utf-8")
+    log.debug("Cleaned user query : %s", elaborated_question)
 
-    if test_api_connection(api_client):
-        response = api_client.query(elaborated_question)
-    else:
-        log.error(
-            f"Verba API not available {api_client.build_url(api_client.api_routes.health)}, query not submitted"
-        )
+    # no pre-flight health check : it doubled the HTTP round-trips on every
+    # chat message, and the query itself surfaces an unreachable backend
+    try:
+        response = _query_verba(api_client, elaborated_question)
+    except requests.exceptions.RequestException as e:
+        log.error("Verba API not available, query not submitted, details : %s", e)
         response = QueryResponsePayload(system="Verba API not available")
+    except BackendQueryError:
+        response = QueryResponsePayload(system=QUERY_ERROR_MESSAGE)
 
     if return_documents:
         return response.system, response.documents
@@ -104,18 +222,50 @@ def display_centered_image(
         )
 
 
+def b64_encode_file(fp, block_size: int = 3 * 64 * 1024) -> str:
+    """Base64 encode a binary file-like object (e.g. a Streamlit UploadedFile)
+    block by block instead of materializing the raw bytes, the encoded bytes
+    and the decoded str all at once. block_size stays a multiple of 3 so each
+    block encodes independently.
+
+    :param fp: binary file-like object
+    :param int block_size: bytes read per iteration, defaults to 192kB
+    :return str: base64 encoded content
+    """
+    fp.seek(0)
+    encoded = bytearray()
+    while chunk := fp.read(block_size):
+        encoded += b64encode(chunk)
+    return bytes(encoded).decode("ascii")
+
+
 def append_documents_in_session_manager(prompt: str, documents: List[Dict]):
     """Append retrieved document in streamlit session_manager
     :param str prompt:
     :param List[Dict] documents:
     """
-    if not "retrieved_documents" in st.session_state:
-        # init empty list
-        st.session_state["retrieved_documents"] = []
-
-    st.session_state["retrieved_documents"].append(
+    st.session_state.setdefault("retrieved_documents", []).append(
         {"prompt": prompt, "documents": documents}
     )
+    # maintained incrementally (newest first) so get_prompt_history does not
+    # rebuild a reversed copy of the whole history on every rerun
+    st.session_state.setdefault("prompt_history", []).insert(0, prompt)
+    # prompt -> documents index, latest answer wins for a repeated prompt,
+    # so lookups stay O(1) however long the conversation gets
+    st.session_state.setdefault("retrieved_documents_by_prompt", {})[prompt] = documents
+
+
+def clear_session_history():
+    """Drop the conversation-related session state : the message list, the
+    raw retrieval history and the derived prompt indexes kept by
+    append_documents_in_session_manager"""
+    for key in (
+        "messages",
+        "retrieved_documents",
+        "prompt_history",
+        "retrieved_documents_by_prompt",
+    ):
+        st.session_state.pop(key, None)
 
 
 def get_prompt_history() -> List[str]:
@@ -123,10 +273,7 @@ def get_prompt_history() -> List[str]:
 
     :return List[str]:
     """
-    if not "retrieved_documents" in st.session_state:
-        return []
-    else:
-        return [e["prompt"] for e in reversed(st.session_state["retrieved_documents"])]
+    return st.session_state.get("prompt_history", [])
 
 
 def get_retrieved_documents_from_prompt(prompt: str) -> List[Dict]:
@@ -134,10 +281,7 @@ def get_retrieved_documents_from_prompt(prompt: str) -> List[Dict]:
     :param str prompt:
     :return List[Dict]:
     """
-    for e in reversed(st.session_state["retrieved_documents"]):
-        if e["prompt"] == prompt:
-            return e["documents"]
-    return []
+    return st.session_state.get("retrieved_documents_by_prompt", {}).get(prompt, [])
 
 
 def doc_id_from_filename(
@@ -148,10 +292,30 @@ def doc_id_from_filename(
     :param SearchQueryResponsePayload search_query_response:
     :return str | None: doc id if document found else None
     """
-    for e in dict(search_query_response).get("documents", []):
-        if e.doc_name == filename:
-            return e.additional.id
-    return None
+    return next(
+        (
+            e.additional.id
+            for e in dict(search_query_response).get("documents", [])
+            if e.doc_name == filename
+        ),
+        None,
+    )
+
+
+def get_doc_id_index(
+    search_query_response: SearchQueryResponsePayload,
+) -> Dict[str, str]:
+    """Build a {doc_name: doc_id} dict from a search query response so
+    repeated filename lookups are O(1) instead of one list scan each
+    (doc_id_from_filename)
+
+    :param SearchQueryResponsePayload search_query_response:
+    :return Dict[str, str]:
+    """
+    return {
+        e.doc_name: e.additional.id
+        for e in dict(search_query_response).get("documents", [])
+    }
 
 
 def get_ordered_all_filenames(
@@ -161,7 +325,7 @@ def get_ordered_all_filenames(
     :param SearchQueryResponsePayload search_query_response:
     :return List[str]:
     """
-    return sorted([e.doc_name for e in documents])
+    return sorted(e.doc_name for e in documents)
 
 
 def store_chatbot_title(title: str):
@@ -169,39 +333,52 @@ def store_chatbot_title(title: str):
 
     :param str title:
     """
-    weaviate_tenant = os.getenv("WEAVIATE_TENANT", default="default_tenant")
-    log.info(f"Storing new chatbot title (tenant {weaviate_tenant}) : {title}")
+    weaviate_tenant = get_weaviate_tenant()
+    log.info("Storing new chatbot title (tenant %s) : %s", weaviate_tenant, title)
 
+    # the shelve/ directory is gitignored, so it does not exist on a fresh
+    # clone and shelve.open would fail without it
+    os.makedirs("shelve", exist_ok=True)
     with shelve.open(f"shelve/key_cache_{weaviate_tenant}") as db:
         db["title"] = title
+    get_chatbot_title.clear()
 
 
+@st.cache_data(show_spinner=False)
 def get_chatbot_title(default_name: str = "Worldline MS Chatbot") -> str:
     """This gets the stored title
 
     :param str default_name:title to set if nothing is already stored defaults to "Worldline MS Chatbot"
     :return str:
     """
-    weaviate_tenant = os.getenv("WEAVIATE_TENANT", default="default_tenant")
-    with shelve.open(f"shelve/key_cache_{weaviate_tenant}") as db:
-        key = f"title"
-        if key in db:
-            return db[key]
-        else:
-            log.info(
-                f'No custom chatbot name found for tenant : {weaviate_tenant}, using the default title "{default_name}"'
-            )
-            return default_name
+    weaviate_tenant = get_weaviate_tenant()
+    try:
+        with shelve.open(f"shelve/key_cache_{weaviate_tenant}") as db:
+            if "title" in db:
+                return db["title"]
+    except dbm.error:
+        # no shelve/ directory yet (fresh clone) or unreadable database :
+        # behave as if no custom title was stored
+        pass
+    log.info(
+        'No custom chatbot name found for tenant : %s, using the default title "%s"',
+        weaviate_tenant,
+        default_name,
+    )
+    return default_name
 
 
 def reset_chatbot_title():
     """This removes the custom title stored"""
-    weaviate_tenant = os.getenv("WEAVIATE_TENANT", default="default_tenant")
-    log.info(f"Resetting chatbot title (tenant {weaviate_tenant})")
-
-    with shelve.open("key_cache") as db:
-        key = f"{weaviate_tenant}_title"
-        if key in db:
-            del db[key]
-        else:
-            log.info(f"{weaviate_tenant} is not in the shelve database.")
+    weaviate_tenant = get_weaviate_tenant()
+    log.info("Resetting chatbot title (tenant %s)", weaviate_tenant)
+
+    try:
+        with shelve.open(f"shelve/key_cache_{weaviate_tenant}") as db:
+            if "title" in db:
+                del db["title"]
+            else:
+                log.info("No custom title stored for tenant %s.", weaviate_tenant)
+    except dbm.error:
+        log.info("No title database for tenant %s, nothing to reset.", weaviate_tenant)
+    get_chatbot_title.clear()